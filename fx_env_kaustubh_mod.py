@@ -1,6 +1,6 @@
-import shutil
 import os
-import glob
+import sys
+import time
 import argparse
 from datetime import datetime
 import logging
@@ -28,48 +28,46 @@ HFS = "20.5.370"  # Default Houdini version (can be changed via args)
 PROJECT_DIR = os.getenv('HOUDINI_PROJECT_DIR')
 FILES_DIR = os.getenv('HOUDINI_FILES_DIR')
 
-if not PROJECT_DIR:
-    raise EnvironmentError("Environment variable HOUDINI_PROJECT_DIR is not set. Please export it in your .bash_env_variables.")
-
-if not FILES_DIR:
-    raise EnvironmentError("Environment variable HOUDINI_FILES_DIR is not set. Please export it in your .bash_env_variables.")
-
 # User for your PC
 STUDENTNAME = os.getenv('USER')
 
-# ==============================================
-# LOGGING SETUP
-# ==============================================
-
-logging.basicConfig(filename=os.path.join(FILES_DIR, 'houdini_script.log'), level=logging.INFO)
-
 # ==============================================
 # ARGUMENT PARSER SETUP
 # ==============================================
 
-parser = argparse.ArgumentParser(description="Houdini Project Manager with backup, restore, and enhanced project management")
-parser.add_argument("-hv", "--hversion", help="Override Houdini version (e.g., -hv 19.5.303)", type=str)
-parser.add_argument("-d", "--debug", help="Enable debugging info", action="store_true")
-parser.add_argument("--backup", help="Create a backup of the current project's *.hip files", action="store_true")
-parser.add_argument("--restore", help="Restore *.hip files from a specific backup timestamp", type=str)
-parser.add_argument("--interactive", help="Start interactive project management mode", action="store_true")
-parser.add_argument("--backup_dir", help="Specify custom directory for backups", type=str)
-args = parser.parse_args()  # Parse the command-line arguments
+def parse_args():
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Houdini Project Manager with backup, restore, and enhanced project management")
+    parser.add_argument("-hv", "--hversion", help="Override Houdini version (e.g., -hv 19.5.303)", type=str)
+    parser.add_argument("-d", "--debug", help="Enable debugging info", action="store_true")
+    parser.add_argument("--backup", help="Create a backup of the current project's *.hip files", action="store_true")
+    parser.add_argument("--restore", help="Restore *.hip files from a specific backup timestamp", type=str)
+    parser.add_argument("--interactive", help="Start interactive project management mode", action="store_true")
+    parser.add_argument("--backup_dir", help="Specify custom directory for backups", type=str)
+    return parser.parse_args()
 
 # ==============================================
 # HELPER FUNCTIONS FOR COLOR PRINTING
 # ==============================================
+# ANSI escape codes, also used directly in the listing loops to skip the helper call per row
+GREEN = "\033[92m"
+RED = "\033[91m"
+YELLOW = "\033[93m"
+BLACK = "\033[30m"
+GRAY = "\033[37m"  # Light gray (or use \033[97m for white)
+RESET = "\033[0m"
+
 def print_green(text):
-    print(f"\033[92m{text}\033[0m")  # Green text
+    print(f"{GREEN}{text}{RESET}")  # Green text
 
 def print_red(text):
-    print(f"\033[91m{text}\033[0m")  # Red text
+    print(f"{RED}{text}{RESET}")  # Red text
 
 def print_yellow(text):
-    print(f"\033[93m{text}\033[0m")  # Yellow text
+    print(f"{YELLOW}{text}{RESET}")  # Yellow text
 
 def print_black(text):
-    print(f"\033[30m{text}\033[0m")  # Black text
+    print(f"{BLACK}{text}{RESET}")  # Black text
 
 def print_ascii_header():
     print_green(HOUDINI_ASCII)
@@ -79,10 +77,31 @@ def print_ascii_header():
 # ==============================================
 def ensure_directory_exists(directory):
     """Ensure the given directory exists; create it if it doesn't."""
-    if not os.path.isdir(directory):
+    try:
         os.makedirs(directory)
-        logging.info(f"Created directory: {directory}")
-        print_yellow(f"Directory created: {directory}")
+    except FileExistsError:
+        # Only pay for the isdir check when something is already there
+        if os.path.isdir(directory):
+            return
+        raise
+    logging.info(f"Created directory: {directory}")
+    print_yellow(f"Directory created: {directory}")
+
+def get_directory_size(directory):
+    """Return the total size in bytes of all files under the given directory."""
+    total = 0
+    # fwalk hands back an open fd per directory, so each file is stat'ed relative to it
+    # instead of resolving its full path from the root again
+    for _, _, files, dir_fd in os.fwalk(directory):
+        total += sum(os.stat(f, dir_fd=dir_fd, follow_symlinks=False).st_size for f in files)
+    return total
+
+def list_hip_files(directory):
+    """Return the paths of all *.hip files directly inside the given directory."""
+    # A plain suffix check on the readdir entries, without glob's pattern matching and extra stats.
+    # Dot-prefixed names are skipped, as glob's '*.hip' does.
+    with os.scandir(directory) as it:
+        return [e.path for e in it if e.name.endswith('.hip') and not e.name.startswith('.') and e.is_file()]
 
 def handle_error(message):
     """Handle and log errors."""
@@ -105,30 +124,29 @@ def ensure_directories_and_symlinks(project_name):
     """Create necessary directories for the project and create a symbolic link named 'GEO' in HOUDINI_FILES_DIR, pointing to GEO in HOUDINI_PROJECT_DIR."""
     required_dirs = ['HIP', 'REF', 'RENDER', 'COMP']  # Directories to be created
 
-    # Create project directory in HOUDINI_FILES_DIR
     project_path = os.path.join(FILES_DIR, project_name)
-    ensure_directory_exists(project_path)
-
-    # Create required subdirectories in uppercase
-    for dir_name in required_dirs:
-        dir_path = os.path.join(project_path, dir_name)
-        ensure_directory_exists(dir_path)
-
-    # Create GEO directory in HOUDINI_PROJECT_DIR under the current project name
     geo_dir_path_project = os.path.join(PROJECT_DIR, project_name, 'GEO')
-    ensure_directory_exists(geo_dir_path_project)
 
-    # Create FLIP directory inside the current project directory
-    flip_dir_path = os.path.join(project_path, 'FLIP')
-    ensure_directory_exists(flip_dir_path)
+    # Project directory and its subdirectories in HOUDINI_FILES_DIR, plus GEO in HOUDINI_PROJECT_DIR
+    targets = [
+        project_path,
+        *(os.path.join(project_path, dir_name) for dir_name in required_dirs),
+        geo_dir_path_project,
+        os.path.join(project_path, 'FLIP'),
+    ]
+    for target in targets:
+        ensure_directory_exists(target)
 
     # Create symbolic link named 'GEO' in HOUDINI_FILES_DIR pointing to GEO in HOUDINI_PROJECT_DIR
     symlink_path = os.path.join(project_path, 'GEO')
-    if not os.path.islink(symlink_path):
+    try:
         os.symlink(geo_dir_path_project, symlink_path)
         print_green(f"Created symbolic link '{symlink_path}' pointing to '{geo_dir_path_project}'")
-    else:
-        print_yellow(f"Symbolic link already exists: {symlink_path}")
+    except FileExistsError:
+        if os.path.islink(symlink_path):
+            print_yellow(f"Symbolic link already exists: {symlink_path}")
+        else:
+            handle_error(f"'{symlink_path}' exists but is not a symbolic link.")
 
     # Set environment variables
     os.environ['PROJECT_NAME'] = project_name
@@ -167,72 +185,89 @@ def set_houdini_environment(hversion):
 # ==============================================
 # PROJECT MANAGEMENT AND SELECTION
 # ==============================================
+def get_project_mtime(project_path):
+    """Return the modification time of the project's HIP directory, or of the project itself if it has none."""
+    # A directory's mtime only changes when its direct children are added, removed or renamed.
+    # The project directory itself barely changes after setup, but HIP/ does whenever a new
+    # .hip file or autosave is written there (overwriting an existing file in place does not count).
+    try:
+        return os.stat(os.path.join(project_path, 'HIP')).st_mtime
+    except FileNotFoundError:
+        return os.stat(project_path).st_mtime
+
 def list_recent_projects(show_all=False):
-    """List recent projects based on their access time."""
-    if not os.path.exists(FILES_DIR):
+    """List recent projects based on when .hip files were last added to their HIP directory."""
+    # Scan once and keep each project's HIP mtime alongside its name.
+    # atime would be no better: it barely moves under relatime/noatime mounts.
+    try:
+        with os.scandir(FILES_DIR) as it:
+            entries = [(e.name, get_project_mtime(e.path)) for e in it if e.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
         handle_error(f"Directory {FILES_DIR} does not exist.")
         return []
-
-    projects = [name for name in os.listdir(FILES_DIR) if os.path.isdir(os.path.join(FILES_DIR, name))]
-    if not projects:
+    if not entries:
         print_yellow("No projects found in FILES_DIR.")
         return []
 
-    # Sort projects based on last access time
-    projects = sorted(projects, key=lambda x: os.path.getatime(os.path.join(FILES_DIR, x)), reverse=True)
+    # Sort projects based on last HIP activity
+    entries = sorted(entries, key=lambda entry: entry[1], reverse=True)
 
     # Show only the last 6 projects unless user opts to show all
     if not show_all:
-        projects = projects[:6]
+        entries = entries[:6]
 
-    print_green("Recent Projects:" if not show_all else "All Projects:")
-    for idx, project in enumerate(projects, start=1):
-        last_accessed = datetime.fromtimestamp(os.path.getatime(os.path.join(FILES_DIR, project))).strftime('%B %d, %Y %I:%M %p')
+    # Build the whole listing first and write it to the terminal in one go
+    buf = [f"{GREEN}{'Recent Projects:' if not show_all else 'All Projects:'}{RESET}\n"]
+    for idx, (project, mtime) in enumerate(entries, start=1):
+        last_modified = time.strftime('%B %d, %Y %I:%M %p', time.localtime(mtime))
         spacing = 40 - len(project)
 
-        # Print project number with leading zero, project name, and access time
-        print(f"\033[92m{idx:02d} - {project}{' ' * spacing}\033[0m", end="")
-        print(f"\033[37m{last_accessed}\033[0m")  # Changed to light gray (or use \033[97m for white)
+        # Project number with leading zero, project name, and last HIP activity in light gray
+        buf.append(f"{GREEN}{idx:02d} - {project}{' ' * spacing}{GRAY}{last_modified}{RESET}\n")
+    sys.stdout.write(''.join(buf))
     
-    return projects
+    return [project for project, _ in entries]
 
 
 def display_directory_sizes(project_path):
     """Display sizes of all directories within the selected project."""
+    import concurrent.futures
+
     print_yellow(f"\nDirectory sizes inside {project_path}:\n")
 
     if not os.path.exists(project_path):
         handle_error(f"Project directory '{project_path}' does not exist.")
         return
 
-    total_size = 0
     directory_sizes = {}  # Dictionary to hold directory names and their sizes
 
-    # List all directories in the project path
-    for directory in os.listdir(project_path):
-        dirpath = os.path.join(project_path, directory)
-        if os.path.isdir(dirpath):
-            # Calculate directory size
-            dir_size = sum(
-                os.path.getsize(os.path.join(dirpath, f))
-                for dirpath, dirnames, filenames in os.walk(dirpath)
-                for f in filenames
-            )
-            directory_sizes[directory] = dir_size  # Store the size
-            total_size += dir_size
+    # List all directories in the project path, skipping symlinks such as GEO so the
+    # (possibly huge) tree it points to in HOUDINI_PROJECT_DIR isn't walked and counted here
+    with os.scandir(project_path) as it:
+        top_dirs = [(e.name, e.path) for e in it if e.is_dir(follow_symlinks=False)]
+
+    # Walk each top-level directory concurrently; the walks are independent
+    if top_dirs:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(top_dirs))) as executor:
+            sizes = executor.map(get_directory_size, [path for _, path in top_dirs])
+            directory_sizes = dict(zip((name for name, _ in top_dirs), sizes))
+    total_size = sum(directory_sizes.values())
 
     # Calculate the maximum length for directory names for alignment
     max_name_length = max(len(name) for name in directory_sizes.keys()) if directory_sizes else 0
 
-    # Display sizes with equal spacing
-    print_green(f"{'Directory':<{max_name_length}}  {'Size (MB)':>12}")  # Header
-    print_green('-' * (max_name_length + 15))  # Divider
+    # Display sizes with equal spacing, written to the terminal in one go
+    buf = [
+        f"{GREEN}{'Directory':<{max_name_length}}  {'Size (MB)':>12}{RESET}\n",  # Header
+        f"{GREEN}{'-' * (max_name_length + 15)}{RESET}\n",  # Divider
+    ]
 
     for directory, size in directory_sizes.items():
-        print_green(f"{directory:<{max_name_length}}  {size / (1024 * 1024):>12.2f}")  # Aligning names and sizes
+        buf.append(f"{GREEN}{directory:<{max_name_length}}  {size / (1024 * 1024):>12.2f}{RESET}\n")  # Aligning names and sizes
 
     # Display the total size of the project
-    print_green(f"\nTotal Project Size (for all directories): {total_size / (1024 * 1024):.2f} MB\n")
+    buf.append(f"{GREEN}\nTotal Project Size (for all directories): {total_size / (1024 * 1024):.2f} MB\n{RESET}\n")
+    sys.stdout.write(''.join(buf))
 
 def select_project():
     """Let the user select a project or create a new one."""
@@ -267,65 +302,69 @@ def select_project():
 
     return project_name  # Ensure project_name is returned correctly
 
-    # Set the current project environment variable
-    os.environ['CURRENT_PROJECT'] = project_name
-    print_green(f"Current project set to: {os.environ['CURRENT_PROJECT']}")
-
-    return project_name  # Ensure project_name is returned
-
 
 
 # ==============================================
 # TERMINAL CUSTOMIZATION SUPPORT
 # ==============================================
 def customize_terminal(project_name, hfs_version):
-    # Set terminal title
-    os.system(f"echo -ne '\\033]0;{project_name} - Houdini {hfs_version}\\007'")
+    # Set terminal title by writing the escape sequence directly, no shell needed
+    sys.stdout.write(f"\033]0;{project_name} - Houdini {hfs_version}\007")
+    sys.stdout.flush()
 
-    # Customize prompt color and content
-    custom_prompt = f'PS1="{project_name} ({hfs_version})$ "'
-    os.system(f'export {custom_prompt}')
+    # Customize prompt color and content for shells started from this process
+    os.environ['PS1'] = f"{project_name} ({hfs_version})$ "
 
 # ==============================================
 # BACKUP AND RESTORE HANDLING
 # ==============================================
 def create_backup(project_dir, backup_dir=None):
     """Create a backup of *.hip files."""
+    import concurrent.futures
+    import shutil
+
     if backup_dir is None:
         backup_dir = os.path.join(project_dir, 'BACKUPS')
 
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_dir = os.path.join(backup_dir, timestamp)
-    ensure_directory_exists(backup_dir)
-    
-    # Find and copy *.hip files to backup directory
-    hip_files = glob.glob(os.path.join(project_dir, '*.hip'))
+    # Find *.hip files first so an empty project doesn't leave an empty backup directory behind
+    hip_files = list_hip_files(project_dir)
     if not hip_files:
         print_red("No .hip files found for backup.")
         return
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_dir = os.path.join(backup_dir, timestamp)
+    ensure_directory_exists(backup_dir)
     
-    for file in hip_files:
-        shutil.copy(file, backup_dir)
-        print_green(f"Backed up {file} to {backup_dir}")
+    # Copy *.hip files to backup directory, keeping several copies in flight so the disk queue stays busy
+    def copy_to_backup(file):
+        shutil.copyfile(file, os.path.join(backup_dir, os.path.basename(file)))
+        return file
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(hip_files))) as executor:
+        for file in executor.map(copy_to_backup, hip_files):
+            print_green(f"Backed up {file} to {backup_dir}")
 
 def restore_backup(project_dir, timestamp):
     """Restore a specific backup based on timestamp."""
+    import shutil
+
     backup_dir = os.path.join(project_dir, 'BACKUPS', timestamp)
     
     if not os.path.exists(backup_dir):
         handle_error(f"No backup found for the specified timestamp: {timestamp}")
         return
     
-    restore_dir = os.path.join(project_dir, f'RESTORED_{timestamp}')
-    ensure_directory_exists(restore_dir)
-    
-    hip_files = glob.glob(os.path.join(backup_dir, '*.hip'))
+    hip_files = list_hip_files(backup_dir)
     if not hip_files:
         handle_error("No .hip files found in the backup.")
         return
+
+    restore_dir = os.path.join(project_dir, f'RESTORED_{timestamp}')
+    ensure_directory_exists(restore_dir)
     
     for file in hip_files:
-        shutil.copy(file, restore_dir)
+        shutil.copyfile(file, os.path.join(restore_dir, os.path.basename(file)))
         print_green(f"Restored {file} to {restore_dir}")
 
 # ==============================================
@@ -377,63 +416,80 @@ def interactive_mode():
 # ==============================================
 def launch_xterm_with_env(project_name, hfs_version):
     """Launch an xterm window with Houdini environment settings."""
+    import subprocess
 
-    # Prepare environment variables
-    houdini_setup = f"""
-export HFS="/opt/hfs{hfs_version}";
-export HOUDINI_PATH="$HFS/houdini;&";
-export PROJECT_NAME="{project_name}";
-export PROJECT_PATH="{FILES_DIR}/{project_name}";
-export COMP="$PROJECT_PATH/COMP";
-export FLIP="$PROJECT_PATH/FLIP";
-export GEO="$PROJECT_PATH/GEO";
-export HIP="$PROJECT_PATH/HIP";
-export REF="$PROJECT_PATH/REF";
-export RENDER="$PROJECT_PATH/RENDER";
-export JOB="$PROJECT_PATH";
-cd $PROJECT_PATH;
-"""
-
-    # Write the environment setup to a temporary file
-    temp_env_file = "/tmp/fx_env_xterm.env"
-    with open(temp_env_file, "w") as env_file:
-        env_file.write(houdini_setup)
+    # Prepare environment variables and hand them straight to the new process
+    hfs_path = f"/opt/hfs{hfs_version}"
+    project_path = os.path.join(FILES_DIR, project_name)
+    env = {
+        **os.environ,
+        "HFS": hfs_path,
+        "HOUDINI_PATH": f"{hfs_path}/houdini;&",
+        "PROJECT_NAME": project_name,
+        "PROJECT_PATH": project_path,
+        "COMP": os.path.join(project_path, "COMP"),
+        "FLIP": os.path.join(project_path, "FLIP"),
+        "GEO": os.path.join(project_path, "GEO"),
+        "HIP": os.path.join(project_path, "HIP"),
+        "REF": os.path.join(project_path, "REF"),
+        "RENDER": os.path.join(project_path, "RENDER"),
+        "JOB": project_path,
+    }
 
     # Launch xterm with the custom environment
     title = f"{project_name} - Houdini {hfs_version}"
-    xterm_cmd = f"xterm -title '{title}' -hold -e 'source {temp_env_file}; /bin/bash' &"
-    
-    os.system(xterm_cmd)
+    try:
+        subprocess.Popen(["xterm", "-title", title, "-hold", "-e", "bash", "-i"], env=env, cwd=project_path)
+    except FileNotFoundError as e:
+        handle_error(f"Cannot launch xterm: {e}")
+        return
     print_green(f"Launched xterm for project '{project_name}' with Houdini {hfs_version}.")
 
 # ==============================================
 # MAIN LOGIC
 # ==============================================
-print_ascii_header()
+def main():
+    """Set up the Houdini environment and project, then launch xterm."""
+    args = parse_args()  # Parse the command-line arguments
+
+    if not PROJECT_DIR:
+        raise EnvironmentError("Environment variable HOUDINI_PROJECT_DIR is not set. Please export it in your .bash_env_variables.")
+
+    if not FILES_DIR:
+        raise EnvironmentError("Environment variable HOUDINI_FILES_DIR is not set. Please export it in your .bash_env_variables.")
+
+    # Logging setup
+    logging.basicConfig(filename=os.path.join(FILES_DIR, 'houdini_script.log'), level=logging.INFO)
+
+    print_ascii_header()
+
+    # Set up Houdini environment
+    print(f"Setting up environment for Houdini {HFS}")
+    if args.hversion:
+        set_houdini_environment(args.hversion)
+
+    project_name = select_project()
+    print(f"Working on project: {project_name}")
 
-# Set up Houdini environment
-print(f"Setting up environment for Houdini {HFS}")
-if args.hversion:
-    set_houdini_environment(args.hversion)
+    # Customize terminal
+    customize_terminal(os.environ['CURRENT_PROJECT'], HFS)
 
-project_name = select_project()
-print(f"Working on project: {project_name}")
+    # Handle backup or restore if specified in arguments
+    if args.backup:
+        create_backup(os.path.join(FILES_DIR, project_name))
+    elif args.restore:
+        restore_backup(os.path.join(FILES_DIR, project_name), args.restore)
 
-# Customize terminal
-customize_terminal(os.environ['CURRENT_PROJECT'], HFS)
+    # Start interactive mode if requested
+    if args.interactive:
+        interactive_mode()
 
-# Handle backup or restore if specified in arguments
-if args.backup:
-    create_backup(os.path.join(FILES_DIR, project_name))
-elif args.restore:
-    restore_backup(os.path.join(FILES_DIR, project_name), args.restore)
+    # Inform the user the project is ready and then launch xterm
+    print(f"Project '{os.environ['CURRENT_PROJECT']}' is ready. You can start working in Houdini now!")
 
-# Start interactive mode if requested
-if args.interactive:
-    interactive_mode()
+    # Launch xterm with environment variables set
+    launch_xterm_with_env(project_name, HFS)
 
-# Inform the user the project is ready and then launch xterm
-print(f"Project '{os.environ['CURRENT_PROJECT']}' is ready. You can start working in Houdini now!")
 
-# Launch xterm with environment variables set
-launch_xterm_with_env(project_name, HFS)
+if __name__ == "__main__":
+    main()